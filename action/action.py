@@ -1,8 +1,8 @@
+import errno
+import shlex
+import shutil
 import subprocess
 from abc import ABC, abstractmethod
-from copy import deepcopy
-
-from scm.scm import SCM
 
 
 class ActionInterface(ABC):
@@ -18,19 +18,11 @@ class BaseAction():
 
 class BaseSCMAction():
     def __init__(self, build, action_config):
-        scm_name = action_config.get('scm_name')
-        if not scm_name:
-            raise ValueError('scm_name is required for SCM Action')
-
         try:
-            scm_config = deepcopy(build.scms[scm_name])
-            self.scm = SCM(scm_config)
+            self.scm = build.get_scm(action_config.scm_name)
         except KeyError as ex:
             raise KeyError(f'Unknown SCM config "{ex}".')
 
-    def execute(self):
-        self.scm.cleanup()
-
 
 class SCMCheckoutAction(BaseSCMAction, BaseAction, ActionInterface):
     def __init__(self, build, action_config, revision=None):
@@ -39,7 +31,6 @@ class SCMCheckoutAction(BaseSCMAction, BaseAction, ActionInterface):
 
     def execute(self):
         self.scm.checkout(revision=self.revision)
-        super().execute()
 
 
 class SCMUploadAction(BaseSCMAction, BaseAction, ActionInterface):
@@ -47,47 +38,117 @@ class SCMUploadAction(BaseSCMAction, BaseAction, ActionInterface):
 
     def __init__(self, build, action_config):
         super().__init__(build, action_config)
-        self.message = action_config.get('message') or self._DEFAULT_SUBMIT_MESSAGE
+        self.message = action_config.message or self._DEFAULT_SUBMIT_MESSAGE
 
     def execute(self):
         self.scm.upload()
-        super().execute()
 
 
 class CommandAction(BaseAction, ActionInterface):
+    # Characters and commands that only shell can handle
+    _SHELL_CHARS = frozenset('|&;<>()$`\\*?[]{}~#\n')
+    _SHELL_BUILTINS = frozenset([
+        '!', '.', ':', '{', '}', 'alias', 'bg', 'break', 'case', 'cd', 'command', 'continue', 'do',
+        'done', 'elif', 'else', 'esac', 'eval', 'exec', 'exit', 'export', 'fg', 'fi', 'for', 'function',
+        'getopts', 'hash', 'if', 'in', 'jobs', 'popd', 'pushd', 'read', 'readonly', 'return', 'set',
+        'shift', 'source', 'then', 'times', 'trap', 'type', 'ulimit', 'umask', 'unset', 'until', 'wait',
+        'while'])
+
     def __init__(self, build, action_config):
         super().__init__(build, action_config)
-        self.commands = action_config.get('commands')
+        self.commands = action_config.commands
 
-    def execute(self):
+        # Simple commands are executed directly, consecutive commands that need shell share a single script
+        self._steps = []
+        shell_commands = []
         for command in self.commands:
+            argv = self._split_command(command)
+            if argv is None:
+                shell_commands.append(command)
+                continue
+
+            if shell_commands:
+                self._steps.append((None, self._build_script(shell_commands)))
+                shell_commands = []
+            self._steps.append((argv, None))
+
+        if shell_commands:
+            self._steps.append((None, self._build_script(shell_commands)))
+
+    @classmethod
+    def _split_command(cls, command):
+        """
+        Splits command into arguments, returns None if command needs shell to run
+        """
+        if any(char in cls._SHELL_CHARS for char in command):
+            return None
+
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            return None
+
+        if not argv or '=' in argv[0] or argv[0] in cls._SHELL_BUILTINS:
+            return None
+
+        # Anything not found as executable is left to shell, e.g. builtins
+        if shutil.which(argv[0]) is None:
+            return None
+
+        return argv
+
+    @staticmethod
+    def _build_script(commands):
+        """
+        Joins commands into a single shell script. Every command runs in its own subshell,
+        so directory and environment changes don't leak into the following commands,
+        and the script stops at the first failed command.
+        """
+        lines = []
+        for command in commands:
+            lines.append(
+                f'(\n{command}\n) || {{ status=$?; '
+                f'printf "Command failed: %s\\n" {shlex.quote(command)} >&2; exit $status; }}')
+        return '\n'.join(lines)
+
+    def execute(self):
+        for argv, script in self._steps:
+            if script:
+                try:
+                    subprocess.run(['/bin/sh', '-c', script], check=True)
+                except subprocess.CalledProcessError as e:
+                    raise RuntimeError(f'Command execution failed with exit status {e.returncode}')
+                continue
+
             try:
-                subprocess.run(command, shell=True, check=True)
-            except subprocess.CalledProcessError as e:
+                try:
+                    subprocess.run(argv, check=True)
+                except OSError as e:
+                    if e.errno != errno.ENOEXEC:
+                        raise
+                    # Executable without shebang, run it with shell the same way execvp does
+                    subprocess.run(['/bin/sh', '-c', shlex.join(argv)], check=True)
+            except (OSError, subprocess.CalledProcessError) as e:
                 raise RuntimeError(f'Command execution failed: {e}')
 
 
 class Action(BaseAction, ActionInterface):
-    def __init__(self, build, action_config):
-        action_name = action_config.pop('name')
-
-        for key, value in action_config.items():
-            if key == 'checkout':
-                self.action = SCMCheckoutAction(build, value)
-                break
-            if key == 'command':
-                self.action = CommandAction(build, value)
-                break
-            if key == 'upload':
-                self.action = SCMUploadAction(build, value)
-                break
+    _ACTION_TYPES = {
+        'checkout': SCMCheckoutAction,
+        'command': CommandAction,
+        'upload': SCMUploadAction,
+    }
 
-        if not self.action:
-            raise ValueError(f'Invalid or unknown action type for {action_name}')
+    def __init__(self, build, action_config):
+        self.name = action_config.name
+        # Actions without explicit dependencies run after the previous action in pipeline
+        self.depends_on = action_config.depends_on
 
-        self.action.name = action_name
+        self.action = self._ACTION_TYPES[action_config.type](build, action_config)
+        self.action.name = action_config.name
 
     def execute(self):
-        print(f"Started action '{self.action.name}'.")
+        # Actions may run concurrently, so every line is written with a single call
+        print(f"Started action '{self.action.name}'.\n", end='', flush=True)
         self.action.execute()
-        print(f"Action '{self.action.name}' completed successfully.")
+        print(f"Action '{self.action.name}' completed successfully.\n", end='', flush=True)
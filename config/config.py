@@ -6,15 +6,42 @@ This module provides a class for loading, validating and managing configuration
 
 import copy
 import os
+import types
 
-import hvac
-import toml
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
 
 ALLOWED_CHANGES_COLLECTION_MODES = ['timestamp', 'changelist']
 
 # pylint: disable-next=invalid-name
 _config = None
 
+# Parsed TOML files keyed by path along with mtime and size they were parsed at,
+# so unchanged files are parsed only once
+_TOML_CACHE = {}
+
+
+def load_toml(path):
+    """
+    Loads TOML file from provided path, reusing the parsed data while the file is unchanged.
+    Returns a copy, so callers are free to modify it.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+
+    cached = _TOML_CACHE.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        data = cached[2]
+    else:
+        # Whole file is read with a single call and decoded at once
+        with open(path, 'rb') as file:
+            data = tomllib.loads(file.read().decode('utf-8'))
+        _TOML_CACHE[path] = (stat.st_mtime_ns, stat.st_size, data)
+
+    return copy.deepcopy(data)
+
 
 def load_config(config_path='config.toml'):
     """
@@ -42,6 +69,9 @@ class Config:
     """
     def __init__(self, config_path):
         self.config_path = os.path.abspath(config_path)
+        self._vault_client = None
+        self._vault_secrets = {}
+        self._sections = {}
         self._load_config()
 
     def _load_config(self):
@@ -51,8 +81,7 @@ class Config:
         if not os.path.exists(self.config_path):
             raise FileNotFoundError(f'Config file not found: {self.config_path}')
 
-        with open(self.config_path, 'r', encoding='utf-8') as file:
-            self._config = toml.load(file)
+        self._config = load_toml(self.config_path)
 
         self._config['main']['ci_home'] = os.path.abspath(self._config['main'].get('ci_home', './ci_home'))
 
@@ -62,15 +91,46 @@ class Config:
                 f'Invalid value for "changes_collection_mode": "{changes_collection_mode}",' +
                 f'valid options are: {ALLOWED_CHANGES_COLLECTION_MODES}')
 
+        self._main_view = types.MappingProxyType(self._config['main'])
+        self._index_vault_keys()
+
+    def _index_vault_keys(self):
+        """
+        Finds keys referring to vault secrets in every config section once, so sections
+        don't have to be scanned on access. Sections without such keys are not indexed.
+        """
+        self._vault_keys = {}
+        for section, section_configs in self._config.items():
+            if not isinstance(section_configs, dict):
+                continue
+
+            for section_name, config_section in section_configs.items():
+                if not isinstance(config_section, dict):
+                    continue
+
+                vault_keys = [
+                    key for key, value in config_section.items()
+                    if isinstance(value, str) and value.startswith('vault://')]
+                if vault_keys:
+                    self._vault_keys[(section, section_name)] = vault_keys
+
     def _get_config_section(self, section, section_name):
         """
-        Actually retrieves the configuration of certain type
+        Actually retrieves the configuration of certain type.
+        Sections are resolved once and returned as shallow copies, nested values must not be modified.
         """
-        config_section = copy.deepcopy(self._config.get(section, {}).get(section_name, {}))
-        if not config_section:
-            raise ValueError(f'Missing {section} config with name "{section_name}"')
+        config_section = self._sections.get((section, section_name))
+        if config_section is None:
+            config_section = copy.copy(self._config.get(section, {}).get(section_name, {}))
+            if not config_section:
+                raise ValueError(f'Missing {section} config with name "{section_name}"')
+
+            vault_keys = self._vault_keys.get((section, section_name))
+            if vault_keys:
+                config_section = self.retrieve_secrets_from_vault(config_section, vault_keys)
+            self._sections[(section, section_name)] = config_section
 
-        return self.retrieve_secrets_from_vault(config_section)
+        return copy.copy(config_section)
 
     def get_connection_config(self, name):
         """
@@ -92,36 +152,45 @@ class Config:
 
     def get_main_config(self):
         """
-        Retrieves the global (main) configuration settings.
+        Retrieves the global (main) configuration settings as read-only mapping.
         """
-        return copy.deepcopy(self._config['main'])
+        return self._main_view
 
-    def retrieve_secrets_from_vault(self, config_section):
+    def retrieve_secrets_from_vault(self, config_section, vault_keys=None):
         """
-        Reads config section, finds and resolves references to vault secret
+        Reads config section, finds and resolves references to vault secret.
+        Keys referring to the same secret are resolved with a single read.
+        When `vault_keys` is given, only these keys are considered as references to vault.
         """
-        for key, value in config_section.items():
-            if isinstance(value, str) and value.startswith('vault://'):
-                secret_path = value[len('vault://'):].strip()
-                secret_data = self._read_secret_from_vault(secret_path)
-                config_section[key] = secret_data
+        if vault_keys is None:
+            vault_keys = [
+                key for key, value in config_section.items()
+                if isinstance(value, str) and value.startswith('vault://')]
+
+        if not vault_keys:
+            return config_section
+
+        secret_refs = {}
+        for key in vault_keys:
+            secret_address = config_section[key][len('vault://'):].strip()
+            secret_mount, secret_path, secret_key = self._parse_secret_address(secret_address)
+            secret_refs.setdefault((secret_mount, secret_path), []).append((key, secret_key))
+
+        for (secret_mount, secret_path), keys in secret_refs.items():
+            secret_data = self._read_secret_from_vault(secret_mount, secret_path)
+            for key, secret_key in keys:
+                secret = secret_data.get(secret_key)
+                if not secret:
+                    raise ValueError(f'Error retrieving secret: Secret don\'t have key {secret_key}')
+                config_section[key] = secret
 
         return config_section
 
-    def _read_secret_from_vault(self, secret_address):
+    @staticmethod
+    def _parse_secret_address(secret_address):
         """
-        Actually resolves references to vault
+        Splits vault secret address into secret mount, path and key
         """
-        vault_addr = self.get_main_config().get('vault_address')
-        vault_token = self.get_main_config().get('vault_token')
-
-        if not vault_addr:
-            raise ValueError('"main.vault_address" should be specified when using secrets')
-        if not vault_token:
-            raise ValueError('"main.vault_token" should be specified when using secrets')
-
-        client = hvac.Client(url=vault_addr, token=vault_token)
-
         secret_address_parts = secret_address.split('#')
         full_secret_path = secret_address_parts[0]
         secret_key = secret_address_parts[1] if len(secret_address_parts) > 1 else None
@@ -138,15 +207,54 @@ class Config:
             raise ValueError(
                 'Invalid secret format, secret should be in format: vault://<secret_engine>/<secret_path>#<secret_key>')
 
+        return secret_mount, secret_path, secret_key
+
+    def _get_vault_client(self):
+        """
+        Returns vault client, creating it on first use
+        """
+        if self._vault_client is None:
+            # Imported lazily, configs without vault secrets should not pay for it
+            # pylint: disable=import-outside-toplevel
+            import hvac
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            vault_addr = self._main_view.get('vault_address')
+            vault_token = self._main_view.get('vault_token')
+
+            if not vault_addr:
+                raise ValueError('"main.vault_address" should be specified when using secrets')
+            if not vault_token:
+                raise ValueError('"main.vault_token" should be specified when using secrets')
+
+            # Keeps connections to vault alive, so TLS handshake is done once for all secrets
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+            self._vault_client = hvac.Client(url=vault_addr, token=vault_token, session=session)
+
+        return self._vault_client
+
+    def _read_secret_from_vault(self, secret_mount, secret_path):
+        """
+        Actually resolves references to vault, every secret is read only once
+        """
+        secret_data = self._vault_secrets.get((secret_mount, secret_path))
+        if secret_data is not None:
+            return secret_data
+
+        client = self._get_vault_client()
+
         try:
             secret_data = client.secrets.kv.v2.read_secret_version(
                 path=secret_path, mount_point=secret_mount)['data']['data']
             if not secret_data:
                 raise ValueError(f'Secret not found at {secret_path}')
-
-            secret = secret_data.get(secret_key)
-            if not secret:
-                raise ValueError(f'Secret don\'t have key {secret_key}')
-            return secret
         except Exception as ex:
             raise ValueError(f'Error retrieving secret: {str(ex)}') from ex
+
+        self._vault_secrets[(secret_mount, secret_path)] = secret_data
+        return secret_data
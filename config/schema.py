@@ -0,0 +1,191 @@
+"""
+Pipeline Schema Module
+
+This module provides classes describing pipeline configuration. Raw configuration is validated
+once when pipeline is loaded, afterwards settings are accessed as attributes.
+"""
+
+from dataclasses import MISSING, dataclass, fields
+
+# Options accepted by every action type
+_ACTION_OPTIONS = {
+    'checkout': {'scm_name'},
+    'command': {'commands'},
+    'upload': {'type', 'scm_name', 'message'},
+}
+
+# Options accepted by command given as table
+_COMMAND_OPTIONS = {'type', 'command'}
+
+
+def _validate_options(cls, config, description):
+    """
+    Checks that config contains all required and only known options of dataclass
+    """
+    known_options = {field.name for field in fields(cls)}
+    unknown_options = set(config) - known_options
+    if unknown_options:
+        raise ValueError(f'Unknown options {sorted(unknown_options)} in {description}')
+
+    for field in fields(cls):
+        if field.default is MISSING and field.name not in config:
+            raise KeyError(f'Option \'{field.name}\' is missing from {description}')
+
+
+@dataclass(slots=True, frozen=True)
+class PerforceScmConfig:
+    """
+    Settings of perforce SCM.
+    """
+    depot_name: str
+    stream_name: str
+    client_root: str
+    connection_config_name: str
+    client_name: str = None
+    sync_force: bool = False
+    sync_clean: bool = True
+    server_trust: bool = True
+
+    @classmethod
+    def from_dict(cls, config):
+        """
+        Creates perforce SCM settings from raw config
+        """
+        _validate_options(cls, config, 'scm configuration')
+        return cls(**config)
+
+
+_SCM_SETTINGS = {
+    'perforce': PerforceScmConfig,
+}
+
+
+@dataclass(slots=True, frozen=True)
+class SCMConfig:
+    """
+    SCM declared in pipeline.
+
+    Parameters:
+    name : str
+        The name actions refer to SCM by.
+
+    type : str
+        The type of SCM, defines class of `settings`.
+
+    settings : PerforceScmConfig
+        The SCM type specific settings.
+    """
+    name: str
+    type: str
+    settings: PerforceScmConfig
+
+    @classmethod
+    def from_dict(cls, name, config):
+        """
+        Creates SCM config from raw config
+        """
+        config = dict(config)
+        scm_type = config.pop('type', None)
+
+        settings_class = _SCM_SETTINGS.get(scm_type)
+        if not settings_class:
+            raise ValueError(f'Invalid scm_type: {scm_type}')
+
+        return cls(name=name, type=scm_type, settings=settings_class.from_dict(config))
+
+
+@dataclass(slots=True, frozen=True)
+class ActionConfig:
+    """
+    Action declared in pipeline.
+
+    Parameters:
+    name : str
+        The name of action.
+
+    type : str
+        The type of action, one of `checkout`, `command` or `upload`.
+
+    depends_on : tuple, optional
+        The names of actions to be completed before this one.
+        If not provided, action depends on the previous action in pipeline.
+
+    scm_name : str, optional
+        The name of SCM used by `checkout` and `upload` actions.
+
+    message : str, optional
+        The submit message of `upload` action.
+
+    commands : tuple, optional
+        The shell commands executed by `command` action.
+    """
+    name: str
+    type: str
+    depends_on: tuple = None
+    scm_name: str = None
+    message: str = None
+    commands: tuple = ()
+
+    @classmethod
+    def from_dict(cls, config):
+        """
+        Creates action config from raw config
+        """
+        config = dict(config)
+        action_name = config.pop('name', None)
+        if not action_name:
+            raise KeyError('Option \'name\' is missing from action configuration')
+
+        depends_on = config.pop('depends_on', None)
+        if depends_on is not None:
+            if not isinstance(depends_on, list) or not all(isinstance(name, str) for name in depends_on):
+                raise ValueError(f'Invalid depends_on of action {action_name}, should be a list of action names')
+            depends_on = tuple(depends_on)
+
+        if len(config) != 1 or next(iter(config)) not in _ACTION_OPTIONS:
+            raise ValueError(f'Invalid or unknown action type for {action_name}')
+
+        action_type, options = next(iter(config.items()))
+
+        unknown_options = set(options) - _ACTION_OPTIONS[action_type]
+        if unknown_options:
+            raise ValueError(f'Unknown options {sorted(unknown_options)} in action {action_name}')
+
+        if action_type in ('checkout', 'upload') and not options.get('scm_name'):
+            raise ValueError('scm_name is required for SCM Action')
+
+        if action_type == 'command':
+            commands = options.get('commands')
+            if not commands:
+                raise ValueError(f'commands are required for command action {action_name}')
+            if not isinstance(commands, list):
+                raise ValueError(f'Invalid commands of action {action_name}, should be a list of commands')
+
+        return cls(
+            name=action_name,
+            type=action_type,
+            depends_on=depends_on,
+            scm_name=options.get('scm_name'),
+            message=options.get('message'),
+            commands=tuple(cls._parse_command(command) for command in options.get('commands', ())))
+
+    @staticmethod
+    def _parse_command(command):
+        """
+        Returns command line of command given either as string or as table with `command` key
+        """
+        if isinstance(command, dict):
+            unknown_options = set(command) - _COMMAND_OPTIONS
+            if unknown_options:
+                raise ValueError(f'Unknown options {sorted(unknown_options)} in command {command}')
+
+            command_type = command.get('type', 'shell')
+            if command_type != 'shell':
+                raise ValueError(f'Invalid command type: {command_type}')
+
+            command = command.get('command')
+
+        if not isinstance(command, str) or not command:
+            raise ValueError(f'Invalid command: {command}')
+
+        return command
@@ -1,7 +1,9 @@
-import toml
+from concurrent.futures import ThreadPoolExecutor
 
 from action.action import Action
-from config.config import load_config
+from config.config import load_config, load_toml
+from config.schema import ActionConfig, SCMConfig
+from scm.scm import SCM
 
 
 class Build:
@@ -9,25 +11,82 @@ class Build:
         self.load_pipeline(pipeline_file)
 
     def load_pipeline(self, pipeline_file):
-        with open(pipeline_file, 'r') as file:
-            pipeline_config = toml.load(file)
+        pipeline_config = load_toml(pipeline_file)
 
-            scms_configs = pipeline_config.get('pipeline', {}).get('scms', [])
-            self.scms = {}
-            for scm_name, scm_config in scms_configs.items():
-                if scm_name in self.scms:
-                    raise ValueError(f'SCM with name {scm_name} already exists')
-                self.scms[scm_name] = scm_config
+        scms_configs = pipeline_config.get('pipeline', {}).get('scms', {})
+        self.scms = {}
+        for scm_name, scm_config in scms_configs.items():
+            if scm_name in self.scms:
+                raise ValueError(f'SCM with name {scm_name} already exists')
+            self.scms[scm_name] = SCMConfig.from_dict(scm_name, scm_config)
 
-            actions_configs = pipeline_config.get('pipeline', {}).get('actions', [])
-            self.actions = []
+        # SCM instances are shared by all actions using the same SCM, so connection is set up only once
+        self._scm_instances = {}
 
-            for action_config in actions_configs:
-                self.actions.append(Action(self, action_config))
+        actions_configs = pipeline_config.get('pipeline', {}).get('actions', [])
+        self.actions = []
 
-    def run(self):
+        for action_config in actions_configs:
+            self.actions.append(Action(self, ActionConfig.from_dict(action_config)))
+
+        self._action_layers = self._build_action_layers()
+
+    def _build_action_layers(self):
+        actions_names = set()
         for action in self.actions:
-            action.execute()
+            if action.name in actions_names:
+                raise ValueError(f'Action with name {action.name} already exists')
+            actions_names.add(action.name)
+
+        dependencies = {}
+        previous_action = None
+        for action in self.actions:
+            if action.depends_on is None:
+                depends_on = [previous_action.name] if previous_action else []
+            else:
+                depends_on = action.depends_on
+
+            for name in depends_on:
+                if name not in actions_names:
+                    raise ValueError(f'Action {action.name} depends on unknown action {name}')
+            dependencies[action.name] = set(depends_on)
+            previous_action = action
+
+        # Every layer contains actions whose dependencies are completed by previous layers
+        layers = []
+        completed = set()
+        while len(completed) < len(self.actions):
+            layer = [
+                action for action in self.actions
+                if action.name not in completed and dependencies[action.name] <= completed]
+            if not layer:
+                raise ValueError('Actions have circular dependencies')
+
+            layers.append(layer)
+            completed.update(action.name for action in layer)
+
+        return layers
+
+    def get_scm(self, scm_name):
+        scm = self._scm_instances.get(scm_name)
+        if scm is None:
+            scm = SCM(self.scms[scm_name])
+            self._scm_instances[scm_name] = scm
+        return scm
+
+    def run(self):
+        try:
+            for layer in self._action_layers:
+                if len(layer) == 1:
+                    layer[0].execute()
+                    continue
+
+                with ThreadPoolExecutor(max_workers=len(layer)) as executor:
+                    # Consuming results re-raises the first action failure
+                    list(executor.map(Action.execute, layer))
+        finally:
+            for scm in self._scm_instances.values():
+                scm.cleanup()
 
 
 if __name__ == '__main__':
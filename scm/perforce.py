@@ -3,6 +3,8 @@ import logging
 import glob
 import socket
 import contextlib
+import itertools
+import threading
 from P4 import P4, P4Exception
 
 from scm.base import SCMBase
@@ -38,23 +40,21 @@ class PerforceConnection(P4):
 
 
 class PerforceSCM(SCMBase):
-    def __init__(self, scm_config=None):
+    def __init__(self, scm_config):
         self.revision = None
         self.changelog = None
 
-        try:
-            self.depot_name = scm_config['depot_name']
-            self.stream_name = scm_config['stream_name']
-            self.client_root = os.path.abspath(scm_config['client_root'])
-        except KeyError as ex:
-            raise KeyError(f'Option {ex} is missing from scm configuration')
-
-        self.client_name = scm_config.get('client_name', self._generate_client_name())
-        self.sync_force = scm_config.get('sync_force', False)
-        self.sync_clean = scm_config.get('sync_clean', True)
-        self.server_trust = scm_config.get('server_trust', True)
-
-        self._connection = PerforceConnection(scm_config['connection_config_name'])
+        self.depot_name = scm_config.depot_name
+        self.stream_name = scm_config.stream_name
+        self.client_root = os.path.abspath(scm_config.client_root)
+        self.client_name = scm_config.client_name or self._generate_client_name()
+        self.sync_force = scm_config.sync_force
+        self.sync_clean = scm_config.sync_clean
+        self.server_trust = scm_config.server_trust
+
+        self._connection = PerforceConnection(scm_config.connection_config_name)
+        # Connection is shared by actions that may run concurrently, so it's used by one of them at a time
+        self._lock = threading.Lock()
         # TODO: Check if depot exists
         # TODO: Check if stream exists
 
@@ -77,18 +77,15 @@ class PerforceSCM(SCMBase):
     @contextlib.contextmanager
     def _in_client(self):
         """
-        A context manager that temporarily changes the current working directory to the
-        workspace root.
+        A context manager that prepares connection and runs perforce commands from the
+        workspace root. Working directory is set on the connection only, so process-wide
+        current directory stays untouched.
         """
-        previous_dir = os.getcwd()
-
-        try:
+        with self._lock:
             if not self._connection.connected():
                 self._connect()
-            os.chdir(self.client_root)
+            self._connection.cwd = self.client_root
             yield
-        finally:
-            os.chdir(previous_dir)
 
     def _connect(self):
         """
@@ -108,27 +105,21 @@ class PerforceSCM(SCMBase):
         """
         with self._in_client():
             args = []
-            kwargs = {}
-
-            if self.sync_force:
-                args.append('-f')
 
             if revision:
                 args.append(f'@{revision}')
 
-            in_sync = False
-
-            try:
-                self._connection.run_sync('-n', *args, **kwargs)
-            except P4Exception as ex:
-                if 'File(s) up-to-date.' in str(ex):
-                    logging.info('Workspace is in sync with depot')
-                    in_sync = True
-                else:
-                    raise ex
-
-            if not in_sync or self.sync_force:
-                self._connection.run_sync(*args, **kwargs)
+            if self.sync_force:
+                self._connection.run_sync('-f', *args)
+            else:
+                # No preview with '-n' needed, sync itself reports when workspace is up-to-date
+                try:
+                    self._connection.run_sync(*args)
+                except P4Exception as ex:
+                    if 'File(s) up-to-date.' in str(ex):
+                        logging.info('Workspace is in sync with depot')
+                    else:
+                        raise ex
 
             if self.sync_clean:
                 pass
@@ -136,6 +127,9 @@ class PerforceSCM(SCMBase):
                 # self._connection.run_clean()
 
     def cleanup(self):
+        if not self._connection.connected():
+            return
+
         self._connection.run_logout()
         self._connection.disconnect()
 
@@ -159,26 +153,37 @@ class PerforceSCM(SCMBase):
         paths = paths or []
 
         with self._in_client():
-            has_changes = False
+            # Client root is absolute already, so joining matches to it gives absolute paths
+            # without calling os.path.abspath for every file
+            client_root = self.client_root
+            files = []
             for file_path in paths:
-                matching_files = glob.glob(file_path)
-                if not matching_files:
+                matching_files = glob.iglob(file_path, root_dir=client_root, recursive=True)
+                first_file = next(matching_files, None)
+                if first_file is None:
                     logging.warning('Invalid path to submit: %s', file_path)
                     continue
 
-                for file in matching_files:
-                    try:
-                        self._connection.run_reconcile('-n', os.path.abspath(file))
-                    except P4Exception as ex:
-                        if 'no file(s) to reconcile' in str(ex):
-                            logging.debug('File %s not changed, not submitting', file)
-                            continue
+                files.extend(
+                    os.path.join(client_root, file) for file in itertools.chain([first_file], matching_files))
 
-                        raise ex
-                    else:
-                        has_changes = True
-                        self._connection.run_reconcile(os.path.abspath(file))
-                        logging.debug('Reconciled %s', file)
+            has_changes = False
+            if files:
+                # p4 warns about every unchanged file, so warnings must not abort reconcile of changed ones
+                with self._connection.at_exception_level(P4.RAISE_ERRORS):
+                    reconciled = self._connection.run_reconcile(*files)
+
+                warnings = [
+                    warning for warning in self._connection.warnings
+                    if 'no file(s) to reconcile' not in warning]
+                if warnings:
+                    raise P4Exception(f'Reconcile failed: {warnings}')
+
+                has_changes = any(isinstance(record, dict) for record in reconciled)
+                if has_changes:
+                    logging.debug('Reconciled %s', files)
+                else:
+                    logging.debug('Files %s not changed, not submitting', files)
 
             if has_changes:
                 self._connection.run_submit('-d', message)
@@ -1,15 +1,14 @@
-from scm.perforce import PerforceSCM
 from scm.base import SCMBase
 
 
 class SCM(SCMBase):
     def __init__(self, scm_config):
-        scm_type = scm_config.pop('type', None)
-
-        if scm_type == 'perforce':
-            self.scm = PerforceSCM(scm_config)
+        if scm_config.type == 'perforce':
+            # Imported lazily to load P4 API only when perforce SCM is actually used
+            from scm.perforce import PerforceSCM  # pylint: disable=import-outside-toplevel
+            self.scm = PerforceSCM(scm_config.settings)
         else:
-            raise ValueError(f'Invalid scm_type: {scm_type}')
+            raise ValueError(f'Invalid scm_type: {scm_config.type}')
 
     def checkout(self, revision=None):
         self.scm.checkout(revision=revision)